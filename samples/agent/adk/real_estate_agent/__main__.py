@@ -1,7 +1,10 @@
+import asyncio
+import contextlib
 import logging
 import os
 import click
 import uvicorn
+from cachetools import TTLCache
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
@@ -9,17 +12,78 @@ from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 from a2ui.a2ui_extension import get_a2ui_agent_extension
 from agent_executor import RealEstateAgentExecutor
 from agent import RealEstateAgent
-from tools import IMAGE_CACHE
+from tools import IMAGE_CACHE, placeholder_image_url
 from genai_utils import generate_property_image
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from starlette.responses import Response
+from starlette.responses import FileResponse, RedirectResponse, Response, StreamingResponse
 import httpx
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The environment is fixed for the lifetime of the process, so read it once.
+API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+MASKED_API_KEY = f"{API_KEY[:5]}...{API_KEY[-5:]}" if API_KEY else "None"
+# genai_utils falls back to the Maps key when no Gemini key is set.
+GEMINI_ENABLED = bool(os.getenv("GOOGLE_CLOUD_API_KEY") or API_KEY)
+
+# Shared client so image proxy requests reuse pooled keep-alive connections to Google.
+MAPS_CLIENT = httpx.AsyncClient(
+    follow_redirects=True,
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0),
+    timeout=httpx.Timeout(10.0, connect=3.0),
+)
+
+# When enabled, AI image generation starts alongside the upstream photo fetch so a
+# failed fetch does not pay for both round-trips. Costs a Gemini call per cache miss.
+SPECULATIVE_AI_FALLBACK = os.getenv("SPECULATIVE_AI_FALLBACK", "false").lower() == "true"
+
+# Upstream photo bytes keyed by (place_id, photo_ref) -> (content_type, body),
+# bounded by the total size of the bodies rather than the number of entries.
+PHOTO_BYTES_CACHE_BUDGET = 64 * 1024 * 1024
+PHOTO_BYTES_CACHE = TTLCache(
+    maxsize=PHOTO_BYTES_CACHE_BUDGET, ttl=86400, getsizeof=lambda entry: len(entry[1])
+)
+MAX_CACHED_PHOTO_BYTES = 2 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Browser caching for real upstream photos. Fallback images are served under the same
+# /proxy-image?id=... URL, so they are cached only briefly and the real photo gets retried.
+PHOTO_CACHE_HEADERS = {"Cache-Control": "public, max-age=86400, immutable"}
+FALLBACK_IMAGE_CACHE_HEADERS = {"Cache-Control": "public, max-age=300"}
+
+# Upstream fetches in progress, so concurrent requests for the same photo share one
+# transfer. Resolves to (content_type, body, cacheable), to None if the upstream fetch failed, or
+# to PHOTO_NOT_BUFFERED if it succeeded but the body could not be shared.
+INFLIGHT_PHOTOS: dict[tuple[str, str], asyncio.Future] = {}
+INFLIGHT_WAIT_TIMEOUT = 10.0
+# The body was too large to buffer or its stream did not finish (e.g. the leading
+# client disconnected); waiters fetch the photo themselves.
+PHOTO_NOT_BUFFERED = object()
+
+class UpstreamStreamingResponse(StreamingResponse):
+    """StreamingResponse that runs on_close once the response ends, even if the body was never iterated."""
+
+    def __init__(self, content, on_close, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.on_close()
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    try:
+        yield
+    finally:
+        await MAPS_CLIENT.aclose()
+
 @click.command()
 @click.option("--host", default="localhost")
 @click.option("--port", default=10003)
@@ -55,7 +119,7 @@ def main(host, port):
             task_store=InMemoryTaskStore(),
         )
         server = A2AStarletteApplication(agent_card=agent_card, http_handler=request_handler)
-        app = server.build()
+        app = server.build(lifespan=lifespan)
 
         app.add_middleware(
             CORSMiddleware,
@@ -68,75 +132,141 @@ def main(host, port):
         @app.route("/proxy-image")
         async def proxy_image(request):
             place_id = request.query_params.get("id", "house")
-            photo_ref = IMAGE_CACHE.get(place_id)
-            api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-            
-            # Seeded house-centric placeholder function
-            def get_placeholder(seed):
-                safe_seed = seed or "home"
-                # Using LoremFlickr with a 'lock' to ensure uniqueness and relevance
-                return f"https://loremflickr.com/800/600/house,interior,home/all?lock={hash(safe_seed) % 10000}"
+            photo_ref = await IMAGE_CACHE.aget(place_id)
 
-            from starlette.responses import RedirectResponse
+            desc = request.query_params.get("desc", "A beautiful residential house")
 
-            if not photo_ref or not api_key:
-                logger.warning(f"No photo_ref found for id {place_id} or missing api_key. Generating AI image.")
-                desc = request.query_params.get("desc", "A beautiful residential house")
-                ai_image_path = await generate_property_image(desc, place_id)
+            async def fallback_response(ai_image_task=None):
+                ai_image_path = await (ai_image_task or generate_property_image(desc, place_id))
                 if ai_image_path:
-                    from starlette.responses import FileResponse
-                    return FileResponse(ai_image_path)
-                return RedirectResponse(url=get_placeholder(place_id))
+                    return FileResponse(ai_image_path, headers=FALLBACK_IMAGE_CACHE_HEADERS)
+                return RedirectResponse(url=placeholder_image_url(place_id))
+
+            if not GEMINI_ENABLED:
+                return RedirectResponse(url=placeholder_image_url(place_id))
+
+            if not photo_ref or not API_KEY:
+                logger.warning(f"No photo_ref found for id {place_id} or missing api_key. Generating AI image.")
+                return await fallback_response()
             
+            cache_key = (place_id, photo_ref)
+            cached = PHOTO_BYTES_CACHE.get(cache_key)
+            if cached:
+                content_type, body = cached
+                return Response(content=body, media_type=content_type, headers=PHOTO_CACHE_HEADERS)
+
+            inflight = INFLIGHT_PHOTOS.get(cache_key)
+            if inflight is not None:
+                try:
+                    result = await asyncio.wait_for(asyncio.shield(inflight), INFLIGHT_WAIT_TIMEOUT)
+                    if result is None:
+                        return await fallback_response()
+                    if result is not PHOTO_NOT_BUFFERED:
+                        content_type, body, cacheable = result
+                        # Honor the upstream no-store that the leading request saw.
+                        headers = PHOTO_CACHE_HEADERS if cacheable else None
+                        return Response(content=body, media_type=content_type, headers=headers)
+                except asyncio.TimeoutError:
+                    # The leading request stalled (e.g. its client went away); fetch independently.
+                    if INFLIGHT_PHOTOS.get(cache_key) is inflight:
+                        del INFLIGHT_PHOTOS[cache_key]
+
+            fetch_done = asyncio.get_running_loop().create_future()
+            INFLIGHT_PHOTOS.setdefault(cache_key, fetch_done)
+
+            def finish_inflight(result):
+                if not fetch_done.done():
+                    fetch_done.set_result(result)
+                if INFLIGHT_PHOTOS.get(cache_key) is fetch_done:
+                    del INFLIGHT_PHOTOS[cache_key]
+
             # Use params for safe encoding by httpx
             base_url = "https://maps.googleapis.com/maps/api/place/photo"
             params = {
                 "maxwidth": 800,
                 "photo_reference": photo_ref,
-                "key": api_key
+                "key": API_KEY
             }
             
-            client = httpx.AsyncClient(follow_redirects=True)
+            ai_image_task = None
+            if SPECULATIVE_AI_FALLBACK:
+                ai_image_task = asyncio.create_task(generate_property_image(desc, place_id))
+
             try:
-                masked_key = f"{api_key[:5]}...{api_key[-5:]}" if api_key else "None"
-                logger.debug(f"Proxying image request for ref: {photo_ref[:20]}... using key: {masked_key}")
+                logger.debug(f"Proxying image request for ref: {photo_ref[:20]}... using key: {MASKED_API_KEY}")
                 
-                req = client.build_request("GET", base_url, params=params)
-                r = await client.send(req, stream=True)
+                req = MAPS_CLIENT.build_request("GET", base_url, params=params)
+                r = await MAPS_CLIENT.send(req, stream=True)
                 
                 if r.status_code != 200:
                     error_body = await r.aread()
                     logger.error(f"Upstream image fetch failed: {r.status_code} for ref: {photo_ref[:20]}. fallback to placeholder.")
                     await r.aclose()
-                    await client.aclose()
-                    desc = request.query_params.get("desc", "A beautiful residential house")
-                    ai_image_path = await generate_property_image(desc, place_id)
-                    if ai_image_path:
-                        from starlette.responses import FileResponse
-                        return FileResponse(ai_image_path)
-                    return RedirectResponse(url=get_placeholder(place_id))
+                    finish_inflight(None)
+                    return await fallback_response(ai_image_task)
+
+                if ai_image_task:
+                    # The generation itself is shielded and still lands in the disk cache.
+                    ai_image_task.cancel()
+                    ai_image_task = None
+
+                content_type = r.headers.get("Content-Type", "image/jpeg")
+                cacheable = "no-store" not in r.headers.get("Cache-Control", "")
+                # Images are normally sent unencoded, so the raw body can be passed through
+                # without httpx's decoder and its length forwarded for progressive rendering.
+                encoded = "Content-Encoding" in r.headers
+                headers = dict(PHOTO_CACHE_HEADERS) if cacheable else {}
+                if not encoded and "Content-Length" in r.headers:
+                    headers["Content-Length"] = r.headers["Content-Length"]
+
+                chunks = []
+                buffered = True
+                completed = False
 
                 async def stream_content():
+                    # Tee the body into a buffer for the cache and waiting requests while streaming it.
+                    nonlocal buffered, completed
+                    size = 0
+                    body = (
+                        r.aiter_bytes(chunk_size=STREAM_CHUNK_SIZE)
+                        if encoded
+                        else r.aiter_raw(chunk_size=STREAM_CHUNK_SIZE)
+                    )
+                    async for chunk in body:
+                        if buffered:
+                            size += len(chunk)
+                            if size > MAX_CACHED_PHOTO_BYTES:
+                                buffered = False
+                                chunks.clear()
+                            else:
+                                chunks.append(chunk)
+                        yield chunk
+                    completed = True
+
+                async def close_upstream():
+                    # Runs however the response ends, so waiters are never left on a dead fetch.
                     try:
-                        async for chunk in r.aiter_bytes():
-                            yield chunk
-                    finally:
                         await r.aclose()
-                        await client.aclose()
+                    finally:
+                        if completed and buffered:
+                            body = b"".join(chunks)
+                            if cacheable:
+                                PHOTO_BYTES_CACHE[cache_key] = (content_type, body)
+                            finish_inflight((content_type, body, cacheable))
+                        else:
+                            finish_inflight(PHOTO_NOT_BUFFERED)
 
-                from starlette.responses import StreamingResponse
-                return StreamingResponse(stream_content(), media_type=r.headers.get("Content-Type", "image/jpeg"))
+                return UpstreamStreamingResponse(
+                    stream_content(), close_upstream, media_type=content_type, headers=headers
+                )
             except Exception as e:
                 logger.error(f"Exception in proxy_image: {e}")
-                await client.aclose()
-                desc = request.query_params.get("desc", "A beautiful residential house")
-                ai_image_path = await generate_property_image(desc, place_id)
-                if ai_image_path:
-                    from starlette.responses import FileResponse
-                    return FileResponse(ai_image_path)
-                return RedirectResponse(url=get_placeholder(place_id))
+                finish_inflight(None)
+                return await fallback_response(ai_image_task)
 
         logger.info(f"Starting Real Estate Agent on {base_url}")
+        # With uvicorn[standard] installed, the default "auto" loop and http pick uvloop
+        # and httptools where the platform supports them.
         uvicorn.run(app, host=host, port=port)
     except Exception as e:
         logger.error(f"Startup error: {e}")
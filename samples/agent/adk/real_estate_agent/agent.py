@@ -1,6 +1,6 @@
-import json
 import logging
 import os
+import time
 from collections.abc import AsyncIterable
 from typing import Any
 
@@ -13,12 +13,12 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 from prompt_builder import (
-    A2UI_SCHEMA,
+    A2UI_SCHEMA_OBJ,
     REAL_ESTATE_UI_EXAMPLES,
     get_text_prompt,
     get_ui_prompt,
 )
-from tools import search_properties, search_realtor_listings
+from tools import search_properties, search_properties_many, search_realtor_listings
 from google.adk.tools.google_maps_grounding_tool import google_maps_grounding
 from google.adk.tools.google_search_tool import GoogleSearchTool
 
@@ -26,6 +26,9 @@ google_search = GoogleSearchTool(bypass_multi_tools_limit=True)
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between "still working" status updates sent while the runner streams events.
+PROCESSING_UPDATE_INTERVAL = 0.5
+
 AGENT_INSTRUCTION = """
     You are an expert Real Estate Agent. Your goal is to find property listings and present them in a rich UI FAST.
     
@@ -34,6 +37,7 @@ AGENT_INSTRUCTION = """
     REQUIRED BEHAVIOR:
     1. **Search**: 
        - Use `search_properties` for general area searches.
+       - Use `search_properties_many` instead when one request needs several searches in the same location (e.g. "condos or townhouses"); it runs up to 8 of them in parallel.
        - **CRITICAL**: Use `google_search` for "for sale" queries (e.g., "homes for sale in Palo Alto") to find actual listings from Zillow, Redfin, or Realtor.com.
        - **AVOID AGENCIES**: Do NOT show real estate agencies, brokers, or property management companies. Only show residential properties or buildings.
        - Cap your final UI to exactly **6** property results.
@@ -49,30 +53,36 @@ AGENT_INSTRUCTION = """
 
 class RealEstateAgent:
     SUPPORTED_CONTENT_TYPES = ["text", "text/plain"]
+    # The LLM returns a list of A2UI messages, so validate against an array of the message schema.
+    A2UI_SCHEMA_OBJECT = {"type": "array", "items": A2UI_SCHEMA_OBJ}
+    # Compiled once; jsonschema.validate() would rebuild the validator on every call.
+    A2UI_VALIDATOR = jsonschema.validators.validator_for(A2UI_SCHEMA_OBJECT)(A2UI_SCHEMA_OBJECT)
 
     def __init__(self, base_url: str, use_ui: bool = False):
         self.base_url = base_url
         self.use_ui = use_ui
-        self._agent = self._build_agent(use_ui)
         self._user_id = "real_estate_user"
-        self._runner = Runner(
-            app_name=self._agent.name,
-            agent=self._agent,
-            artifact_service=InMemoryArtifactService(),
-            session_service=InMemorySessionService(),
-            memory_service=InMemoryMemoryService(),
-        )
-
-        try:
-            single_message_schema = json.loads(A2UI_SCHEMA)
-            self.a2ui_schema_object = {"type": "array", "items": single_message_schema}
-        except Exception as e:
-            logger.error(f"Failed to parse A2UI_SCHEMA: {e}")
-            self.a2ui_schema_object = None
+        # Built on first stream() so the executor can hold both variants cheaply.
+        self._agent = None
+        self._runner = None
+        self.a2ui_schema_object = self.A2UI_SCHEMA_OBJECT
+        self.a2ui_validator = self.A2UI_VALIDATOR
 
     def get_processing_message(self) -> str:
         return "Searching for the perfect properties for you..."
 
+    def _get_runner(self) -> Runner:
+        if self._runner is None:
+            self._agent = self._build_agent(self.use_ui)
+            self._runner = Runner(
+                app_name=self._agent.name,
+                agent=self._agent,
+                artifact_service=InMemoryArtifactService(),
+                session_service=InMemorySessionService(),
+                memory_service=InMemoryMemoryService(),
+            )
+        return self._runner
+
     def _build_agent(self, use_ui: bool) -> LlmAgent:
         GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
         
@@ -86,30 +96,32 @@ class RealEstateAgent:
             name="real_estate_agent",
             description="An agent that finds real estate holdings using Google Maps and Search grounding.",
             instruction=instruction,
-            tools=[search_properties, google_search],
+            tools=[search_properties, search_properties_many, google_search],
         )
 
     async def stream(self, query, session_id) -> AsyncIterable[dict[str, Any]]:
         # Similar logic to RestaurantAgent but for RealEstate
         session_state = {"base_url": self.base_url}
-        session = await self._runner.session_service.get_session(
-            app_name=self._agent.name, user_id=self._user_id, session_id=session_id
+        runner = self._get_runner()
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id=self._user_id, session_id=session_id
         )
         if session is None:
-            session = await self._runner.session_service.create_session(
-                app_name=self._agent.name, user_id=self._user_id, state=session_state, session_id=session_id
+            session = await runner.session_service.create_session(
+                app_name=runner.app_name, user_id=self._user_id, state=session_state, session_id=session_id
             )
 
         max_retries = 1
         attempt = 0
         current_query_text = query
+        last_update_ts = None
 
         while attempt <= max_retries:
             attempt += 1
             current_message = types.Content(role="user", parts=[types.Part.from_text(text=current_query_text)])
             final_response_content = None
 
-            async for event in self._runner.run_async(user_id=self._user_id, session_id=session.id, new_message=current_message):
+            async for event in runner.run_async(user_id=self._user_id, session_id=session.id, new_message=current_message):
                 if final_response_content is None and event.content and event.content.parts:
                     texts = [p.text for p in event.content.parts if p.text]
                     if texts:
@@ -117,7 +129,11 @@ class RealEstateAgent:
                 if event.is_final_response():
                     break
                 else:
-                    yield {"is_task_complete": False, "updates": self.get_processing_message()}
+                    # The runner emits many intermediate events; don't repeat the same status for each.
+                    now = time.monotonic()
+                    if last_update_ts is None or now - last_update_ts >= PROCESSING_UPDATE_INTERVAL:
+                        last_update_ts = now
+                        yield {"is_task_complete": False, "updates": self.get_processing_message()}
 
             if final_response_content:
                 # Validation logic here (simplified for brevity)
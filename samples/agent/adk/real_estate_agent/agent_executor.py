@@ -1,5 +1,7 @@
-import json
 import logging
+from typing import Any
+
+import orjson
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
 from a2a.server.tasks import TaskUpdater
@@ -22,6 +24,84 @@ from agent import RealEstateAgent
 
 logger = logging.getLogger(__name__)
 
+def parse_a2ui_messages(text: str) -> list[Any]:
+    """
+    Parses the A2UI messages from the JSON portion of an LLM response.
+
+    The span from the first '[' or '{' to the last ']' or '}' is parsed directly, which
+    skips any prose or code fences around it. Only if that fails (e.g. the response was
+    truncated) is the text scanned to recover the messages that are complete.
+    """
+    starts = [i for i in (text.find("["), text.find("{")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON value found in A2UI response.")
+    start = min(starts)
+    end = max(text.rfind("]"), text.rfind("}"))
+    if end > start:
+        try:
+            json_data = orjson.loads(text[start:end + 1])
+            return json_data if isinstance(json_data, list) else [json_data]
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"JSONDecodeError on A2UI response, recovering individual messages: {e}")
+    return _recover_a2ui_messages(text, start)
+
+def _recover_a2ui_messages(text: str, start: int) -> list[Any]:
+    """
+    Recovers A2UI messages from JSON that does not parse as a whole.
+
+    A single pass from `start` tracks bracket depth outside string literals to find the
+    outermost JSON value. If that value does not parse either, the complete elements of
+    the top-level list seen during the scan are parsed individually instead.
+    """
+    depth = 1
+    in_string = False
+    escaped = False
+    element_start = -1
+    elements = []
+    outer = None
+    for i in range(start + 1, len(text)):
+        c = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in "[{":
+            depth += 1
+            if depth == 2 and text[start] == "[":
+                element_start = i
+        elif c in "]}":
+            depth -= 1
+            if depth == 0:
+                outer = text[start:i + 1]
+                break
+            if depth == 1 and element_start != -1:
+                elements.append(text[element_start:i + 1])
+                element_start = -1
+
+    if outer is not None:
+        try:
+            json_data = orjson.loads(outer)
+            return json_data if isinstance(json_data, list) else [json_data]
+        except orjson.JSONDecodeError as e:
+            logger.warning(f"A2UI response JSON does not parse, keeping complete messages: {e}")
+    else:
+        logger.warning("A2UI response JSON is truncated, recovering complete messages.")
+
+    messages = []
+    for element in elements:
+        try:
+            messages.append(orjson.loads(element))
+        except orjson.JSONDecodeError:
+            logger.warning(f"Dropping unparsable A2UI message: {element[:200]}")
+    if not messages:
+        raise ValueError("No parsable A2UI messages found in response.")
+    return messages
+
 class RealEstateAgentExecutor(AgentExecutor):
     def __init__(self, base_url: str):
         self.ui_agent = RealEstateAgent(base_url=base_url, use_ui=True)
@@ -55,34 +135,11 @@ class RealEstateAgentExecutor(AgentExecutor):
                     final_parts.append(Part(root=TextPart(text=text_content.strip())))
                 
                 try:
-                    json_string_cleaned = json_string.strip()
-                    # Find the first '[' or '{' and the last ']' or '}'
-                    first_item = min([json_string_cleaned.find(c) for c in '[{' if json_string_cleaned.find(c) != -1] or [0])
-                    last_item = max([json_string_cleaned.rfind(c) for c in ']}' if json_string_cleaned.rfind(c) != -1] or [len(json_string_cleaned)])
-                    json_string_cleaned = json_string_cleaned[first_item:last_item+1]
-                    
-                    try:
-                        json_data = json.loads(json_string_cleaned)
-                        if isinstance(json_data, list):
-                            for message in json_data:
-                                final_parts.append(create_a2ui_part(message))
-                        else:
-                            final_parts.append(create_a2ui_part(json_data))
-                    except json.JSONDecodeError:
-                        # Fallback: simple split if it looks like multiple objects
-                        # The recursive regex was broken, let's just try to find objects by braces
-                        # if they are top-level. 
-                        logger.warning("JSONDecodeError, attempting fallback splitting")
-                        # This is still a bit of a guess, but better than a crash
-                        potential_objects = []
-                        if json_string_cleaned.startswith('[') and json_string_cleaned.endswith(']'):
-                            # It's a list but maybe has issues inside? 
-                            # If it's a list, the previous json.loads should have worked unless truncated.
-                            pass
-                        
-                        # If we can't parse it as one, and it's not a crash-inducing regex, 
-                        # let's just log the error and move on if we can't easily fix it.
-                        raise # Re-raise to be caught by the outer try-except for logging
+                    messages = parse_a2ui_messages(json_string)
+                    for error in agent.a2ui_validator.iter_errors(messages):
+                        logger.warning(f"A2UI schema validation error: {error.message}")
+                    for message in messages:
+                        final_parts.append(create_a2ui_part(message))
                 except Exception as e:
                     logger.error(f"Failed to parse UI JSON: {e}")
                     final_parts.append(Part(root=TextPart(text=json_string)))
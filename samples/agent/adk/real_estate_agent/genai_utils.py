@@ -1,7 +1,10 @@
 import os
+import asyncio
+import json
 import logging
 import base64
 import hashlib
+import time
 from google import genai
 from google.genai import types
 
@@ -11,6 +14,33 @@ logger = logging.getLogger(__name__)
 CACHE_DIR = "/tmp/re_images"
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+IMAGE_MODEL = "gemini-3-pro-image-preview"
+# Bump when the prompt template changes so previously cached images are regenerated.
+PROMPT_VERSION = 1
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Built once; only the prompt text varies between calls.
+IMAGE_GENERATION_CONFIG = types.GenerateContentConfig(
+    # A lower temperature keeps repeated prompts close, which suits the prompt-keyed cache.
+    temperature=0.4,
+    top_p=0.95,
+    response_modalities=["IMAGE"], # We only want the image
+    safety_settings=[
+        types.SafetySetting(category="HARM_CATEGORY_HATE_SPEECH", threshold="OFF"),
+        types.SafetySetting(category="HARM_CATEGORY_DANGEROUS_CONTENT", threshold="OFF"),
+        types.SafetySetting(category="HARM_CATEGORY_SEXUALLY_EXPLICIT", threshold="OFF"),
+        types.SafetySetting(category="HARM_CATEGORY_HARASSMENT", threshold="OFF"),
+    ],
+    image_config=types.ImageConfig(
+        aspect_ratio="1:1",
+        image_size="1K",
+        # output_mime_type is not supported in Gemini API (vertexai=False)
+    ),
+)
+
+# In-flight generations keyed by cache key, so concurrent requests share one Gemini call.
+_INFLIGHT: dict[str, asyncio.Task] = {}
+
 def get_gemini_client():
     """Builds the GenAI client using environment variables."""
     # Prioritize GOOGLE_CLOUD_API_KEY as provided by the user for Gemini 3
@@ -24,30 +54,74 @@ def get_gemini_client():
         api_key=api_key,
     )
 
+def _build_image_prompt(description: str) -> str:
+    """Builds the image generation prompt for a property description."""
+    # Prompt enhancement for high-quality real estate images
+    enhanced_desc = description if description and len(description) > 5 else "A beautiful residential house"
+    return f"A high-quality, professional real estate photograph of {enhanced_desc}. Sunny day, realistic, architectural photography style, wide angle."
+
+def _cache_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}|{prompt}".encode()).hexdigest()
+
+def _get_cached_image(key: str) -> str | None:
+    """Returns the cached image path for key if it exists and is still fresh."""
+    image_path = os.path.join(CACHE_DIR, f"{key}.png")
+    meta_path = os.path.join(CACHE_DIR, f"{key}.json")
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("prompt_version") != PROMPT_VERSION:
+        return None
+    if time.time() - meta.get("created_at", 0) > CACHE_TTL_SECONDS:
+        return None
+    if not os.path.exists(image_path):
+        return None
+    return image_path
+
 async def generate_property_image(description: str, seed: str) -> str:
     """
     Generates a property image using Imagen 3 based on the description.
     Returns the path to the cached image.
     """
-    # Create a unique filename based on the seed (e.g. place_id)
-    safe_seed = hashlib.md5(seed.encode()).hexdigest()
-    image_path = os.path.join(CACHE_DIR, f"{safe_seed}.png")
-    
-    # Check if already cached
-    if os.path.exists(image_path):
+    prompt = _build_image_prompt(description)
+    key = _cache_key(IMAGE_MODEL, prompt)
+
+    cached_path = _get_cached_image(key)
+    if cached_path:
         logger.info(f"Using cached AI image for {seed}")
-        return image_path
+        return cached_path
+
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_and_cache(prompt, key))
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    else:
+        logger.info(f"Joining in-flight AI image generation for {seed}")
+
+    # Shield so a cancelled caller does not abort the generation other callers are waiting on.
+    return await asyncio.shield(task)
+
+def _write_cache_entry(image_path: str, meta_path: str, data: bytes, meta: dict) -> None:
+    with open(image_path, "wb") as f:
+        f.write(data)
+    # Written last so a partially written image is never treated as a cache hit.
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
 
-    logger.info(f"Generating AI image for: {description}")
+async def _generate_and_cache(prompt: str, key: str) -> str:
+    """Calls Gemini for prompt and stores the image and its metadata under key."""
+    image_path = os.path.join(CACHE_DIR, f"{key}.png")
+    meta_path = os.path.join(CACHE_DIR, f"{key}.json")
+
+    logger.info(f"Generating AI image for: {prompt}")
     client = get_gemini_client()
     if not client:
         return None
 
-    model = "gemini-3-pro-image-preview"
-    
-    # Prompt enhancement for high-quality real estate images
-    enhanced_desc = description if description and len(description) > 5 else "A beautiful residential house"
-    prompt = f"A high-quality, professional real estate photograph of {enhanced_desc}. Sunny day, realistic, architectural photography style, wide angle."
+    model = IMAGE_MODEL
     
     contents = [
         types.Content(
@@ -56,38 +130,26 @@ async def generate_property_image(description: str, seed: str) -> str:
         )
     ]
 
-    generate_content_config = types.GenerateContentConfig(
-        temperature=1,
-        top_p=0.95,
-        max_output_tokens=32768,
-        response_modalities=["IMAGE"], # We only want the image
-        safety_settings=[
-            types.SafetySetting(category="HARM_CATEGORY_HATE_SPEECH", threshold="OFF"),
-            types.SafetySetting(category="HARM_CATEGORY_DANGEROUS_CONTENT", threshold="OFF"),
-            types.SafetySetting(category="HARM_CATEGORY_SEXUALLY_EXPLICIT", threshold="OFF"),
-            types.SafetySetting(category="HARM_CATEGORY_HARASSMENT", threshold="OFF"),
-        ],
-        image_config=types.ImageConfig(
-            aspect_ratio="1:1",
-            image_size="1K",
-            # output_mime_type is not supported in Gemini API (vertexai=False)
-        ),
-    )
-
     try:
-        # We use non-streaming generation for simplicity when saving to file
-        response = client.models.generate_content(
+        # We use non-streaming generation for simplicity when saving to file.
+        # The async surface keeps the event loop free while Gemini renders the image.
+        response = await client.aio.models.generate_content(
             model=model,
             contents=contents,
-            config=generate_content_config,
+            config=IMAGE_GENERATION_CONFIG,
         )
         
         # Extract the image from the parts
         for part in response.candidates[0].content.parts:
             if part.inline_data:
-                # Save the image
-                with open(image_path, "wb") as f:
-                    f.write(part.inline_data.data)
+                # Save the image off the event loop
+                meta = {
+                    "prompt": prompt,
+                    "model": model,
+                    "prompt_version": PROMPT_VERSION,
+                    "created_at": time.time(),
+                }
+                await asyncio.to_thread(_write_cache_entry, image_path, meta_path, part.inline_data.data, meta)
                 logger.info(f"Successfully generated and cached AI image: {image_path}")
                 return image_path
                 
@@ -1,5 +1,8 @@
+import functools
 import json
 
+import orjson
+
 A2UI_SCHEMA = r'''
 {
   "title": "A2UI Message Schema",
@@ -12,7 +15,10 @@ A2UI_SCHEMA = r'''
 }
 '''
 
-REAL_ESTATE_UI_EXAMPLES = r'''
+# Parsed once at import; the schema string above is a constant.
+A2UI_SCHEMA_OBJ = orjson.loads(A2UI_SCHEMA)
+
+_PRETTY_REAL_ESTATE_UI_EXAMPLES = r'''
 Example 1: Premium Redfin-style Property List
 ---a2ui_JSON---
 [
@@ -87,6 +93,20 @@ Example 1: Premium Redfin-style Property List
 ]
 '''
 
+def _compact_examples(examples: str) -> str:
+    """Re-serializes each example's JSON block without whitespace to cut prompt tokens."""
+    decoder = json.JSONDecoder()
+    parts = examples.split("---a2ui_JSON---")
+    compacted = [parts[0]]
+    for part in parts[1:]:
+        block = part.lstrip()
+        value, end = decoder.raw_decode(block)
+        compacted.append("\n" + json.dumps(value, separators=(",", ":"), ensure_ascii=False) + block[end:])
+    return "---a2ui_JSON---".join(compacted)
+
+REAL_ESTATE_UI_EXAMPLES = _compact_examples(_PRETTY_REAL_ESTATE_UI_EXAMPLES)
+
+@functools.lru_cache(maxsize=8)
 def get_ui_prompt(base_url: str, examples: str) -> str:
     # Use regular string concatenation to avoid braces issue
     return """
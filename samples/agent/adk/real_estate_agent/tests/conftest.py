@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The sample imports its modules by bare name (e.g. `from agent import RealEstateAgent`).
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,47 @@
+import pytest
+
+from agent_executor import parse_a2ui_messages
+
+BEGIN = '{"beginRendering": {"surfaceId": "s", "root": "r"}}'
+UPDATE = '{"dataModelUpdate": {"surfaceId": "s", "contents": [{"key": "title", "valueString": "A [quoted] \\"home\\""}]}}'
+
+
+def test_parses_list():
+    messages = parse_a2ui_messages(f"[{BEGIN}, {UPDATE}]")
+
+    assert [next(iter(m)) for m in messages] == ["beginRendering", "dataModelUpdate"]
+
+
+def test_strips_code_fence():
+    messages = parse_a2ui_messages(f"```json\n[{BEGIN}]\n```")
+
+    assert messages == [{"beginRendering": {"surfaceId": "s", "root": "r"}}]
+
+
+def test_wraps_bare_object():
+    messages = parse_a2ui_messages(BEGIN)
+
+    assert messages == [{"beginRendering": {"surfaceId": "s", "root": "r"}}]
+
+
+def test_keeps_brackets_and_escaped_quotes_inside_strings():
+    messages = parse_a2ui_messages(f"[{UPDATE}]")
+
+    assert messages[0]["dataModelUpdate"]["contents"][0]["valueString"] == 'A [quoted] "home"'
+
+
+def test_recovers_complete_messages_from_truncated_list():
+    messages = parse_a2ui_messages(f'[{BEGIN}, {UPDATE}, {{"surfaceUpdate": {{"surfaceId": "s", "comp')
+
+    assert [next(iter(m)) for m in messages] == ["beginRendering", "dataModelUpdate"]
+
+
+def test_recovers_when_truncated_inside_string_with_bracket():
+    messages = parse_a2ui_messages(f'```json\n[{BEGIN}, {{"surfaceUpdate": {{"surfaceId": "s]}}')
+
+    assert messages == [{"beginRendering": {"surfaceId": "s", "root": "r"}}]
+
+
+def test_rejects_text_without_json():
+    with pytest.raises(ValueError):
+        parse_a2ui_messages("Sorry, no listings found.")
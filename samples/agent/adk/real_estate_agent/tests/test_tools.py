@@ -0,0 +1,25 @@
+from tools import PhotoRefCache
+
+
+def test_photo_ref_cache_shares_entries_across_instances(tmp_path):
+    path = str(tmp_path / "refs.sqlite3")
+    writer = PhotoRefCache(path, ttl_seconds=3600)
+    reader = PhotoRefCache(path, ttl_seconds=3600)
+
+    writer["place"] = "ref-1"
+
+    assert reader.get("place") == "ref-1"
+    assert reader.get("missing", "default") == "default"
+
+
+def test_photo_ref_cache_picks_up_rewritten_refs(tmp_path):
+    path = str(tmp_path / "refs.sqlite3")
+    writer = PhotoRefCache(path, ttl_seconds=3600)
+    # A zero front lifetime stands in for the front entry having aged out.
+    reader = PhotoRefCache(path, ttl_seconds=3600, recent_ttl_seconds=0.0)
+
+    writer["place"] = "ref-1"
+    assert reader.get("place") == "ref-1"
+    writer["place"] = "ref-2"
+
+    assert reader.get("place") == "ref-2"
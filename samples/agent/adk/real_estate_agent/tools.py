@@ -1,14 +1,236 @@
+import asyncio
+import functools
 import urllib.parse
 import googlemaps
 import logging
 import binascii
 import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
 
-# Global cache to map place_id -> photo_reference to avoid long URLs in UI
-IMAGE_CACHE = {}
+class _LRU:
+    """Mapping that evicts its least recently used entry once it exceeds maxsize."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._data[key]
+        except KeyError:
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+class PhotoRefCache:
+    """
+    Maps place_id -> photo_reference for every worker process on the host.
+
+    The agent learns photo references in one worker while /proxy-image may be served
+    by another, so entries live in a SQLite file in WAL mode rather than process memory.
+    """
+
+    def __init__(self, path: str | None, ttl_seconds: int, maxsize: int = 1024, recent_ttl_seconds: float = 60.0):
+        # None defers to $IMAGE_CACHE_DB, read on first use so a .env loaded after import applies.
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        # Bounded in-process front so hot place_ids skip SQLite: place_id -> (photo_ref, expires_at).
+        # Entries live at most recent_ttl_seconds, so refs rewritten by another worker are picked up.
+        self._recent = _LRU(maxsize=maxsize)
+        self._recent_ttl_seconds = recent_ttl_seconds
+        self._recent_lock = threading.Lock()
+        # sqlite3 connections can't be shared across threads, and ADK may run tools in one.
+        self._local = threading.local()
+        self._next_purge = 0.0
+
+    def _purge_expired(self) -> None:
+        # Keeps the shared table bounded by the TTL in long-running servers.
+        now = time.time()
+        if now >= self._next_purge:
+            self._next_purge = now + self._ttl_seconds / 6
+            self._connect().execute("DELETE FROM photo_refs WHERE expires_at <= ?", (now,))
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._path is None:
+                self._path = os.getenv("IMAGE_CACHE_DB", "/tmp/re_image_cache.sqlite3")
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS photo_refs "
+                "(place_id TEXT PRIMARY KEY, photo_ref TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _get_recent(self, place_id: str, now: float) -> str | None:
+        with self._recent_lock:
+            entry = self._recent.get(place_id)
+        if entry and entry[1] > now:
+            return entry[0]
+        return None
+
+    def get(self, place_id: str, default: str | None = None) -> str | None:
+        now = time.time()
+        photo_ref = self._get_recent(place_id, now)
+        if photo_ref is not None:
+            return photo_ref
+
+        row = self._connect().execute(
+            "SELECT photo_ref, expires_at FROM photo_refs WHERE place_id = ? AND expires_at > ?",
+            (place_id, now),
+        ).fetchone()
+        if not row:
+            return default
+        photo_ref, expires_at = row
+        with self._recent_lock:
+            self._recent[place_id] = (photo_ref, min(expires_at, now + self._recent_ttl_seconds))
+        return photo_ref
+
+    async def aget(self, place_id: str, default: str | None = None) -> str | None:
+        """Like get(), but runs any SQLite lookup in a worker thread instead of on the event loop."""
+        photo_ref = self._get_recent(place_id, time.time())
+        if photo_ref is not None:
+            return photo_ref
+        return await asyncio.to_thread(self.get, place_id, default)
+
+    def __setitem__(self, place_id: str, photo_ref: str) -> None:
+        now = time.time()
+        expires_at = now + self._ttl_seconds
+        self._connect().execute(
+            "INSERT OR REPLACE INTO photo_refs (place_id, photo_ref, expires_at) VALUES (?, ?, ?)",
+            (place_id, photo_ref, expires_at),
+        )
+        self._purge_expired()
+        with self._recent_lock:
+            self._recent[place_id] = (photo_ref, min(expires_at, now + self._recent_ttl_seconds))
+
+    def __len__(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM photo_refs WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+# Global cache to map place_id -> photo_reference to avoid long URLs in UI.
+# Entries outlive the chat sessions that show them; an expired ref falls back to an AI image.
+IMAGE_CACHE = PhotoRefCache(None, ttl_seconds=7 * 24 * 60 * 60, maxsize=1024)
+
+# Aggressive filter for commercial real estate entities, matched as substrings of the
+# lowercased place name in a single regex scan.
+AVOID_KEYWORDS = frozenset({
+    "realty", "agency", "real estate", "broker", "office",
+    "management", "apartment", "complex", "corporate", "builders",
+    "development", "advisors", "properties", "mortgage", "lending",
+    "title", "escrow", "associates", "partners", "group", "team",
+})
+HARD_AVOID_KEYWORDS = frozenset({"real estate", "realty", "broker", "agency", "management"})
+_AVOID_RE = re.compile("|".join(map(re.escape, sorted(AVOID_KEYWORDS))))
+_HARD_AVOID_RE = re.compile("|".join(map(re.escape, sorted(HARD_AVOID_KEYWORDS))))
+
+# The UI shows at most this many property cards.
+MAX_RESULTS = 6
+
+# Places API quota makes more concurrent queries than this counterproductive.
+MAX_PARALLEL_QUERIES = 8
+
+# Property names repeat across searches, so memoize their URL encoding.
+_quote = functools.lru_cache(maxsize=1024)(urllib.parse.quote)
+
+@functools.lru_cache(maxsize=4)
+def _get_gmaps(api_key: str) -> googlemaps.Client:
+    # The client owns a requests.Session, so reusing it keeps the TLS connection alive.
+    return googlemaps.Client(key=api_key)
+
+def placeholder_image_url(seed: str) -> str:
+    """Seeded house-centric LoremFlickr image, used wherever a real photo is unavailable."""
+    # crc32 is stable across restarts (unlike hash()), so browsers and CDNs can cache the URL.
+    lock = binascii.crc32((seed or "home").encode()) % 10000
+    return f"https://loremflickr.com/800/600/house,interior,home/all?lock={lock}"
+
+def _residential_query(query: str, location: str) -> str:
+    # We want to find actual listings, not real estate agencies.
+    # Adding 'address' to the search query often helps Google Maps find specific residential properties.
+    # Use more specific residential keywords
+    return f"{query} in {location} residential property single family home"
+
+def _unique_places(places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drops repeats of a place_id, keeping the first occurrence."""
+    seen = set()
+    unique = []
+    for place in places:
+        place_id = place.get('place_id')
+        if place_id:
+            if place_id in seen:
+                continue
+            seen.add(place_id)
+        unique.append(place)
+    return unique
+
+def _build_results(places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filters Places API results down to residential listings and shapes them for the UI."""
+    results = []
+    base_url = os.getenv("BASE_URL", "http://localhost:10003")
+    for place in _unique_places(places):
+        if len(results) >= MAX_RESULTS: # Cap for speed
+            break
+        # Bind the fields used below once instead of repeated place.get() calls.
+        place_get = place.get
+        name_raw = place_get('name')
+        name = (name_raw or '').lower()
+        # Unconditional skip if it contains multiple suspicious keywords
+        if _AVOID_RE.search(name):
+            # If it has "Real Estate" or "Realty" or "Broker", it's almost certainly a company.
+            # If we have some results, be even more aggressive
+            if _HARD_AVOID_RE.search(name) or results:
+                continue
+            
+        logger.debug(f"Processing place: {name_raw}")
+        
+        # OPTIMIZATION: Avoid sequential 'gmaps.place' calls for details.
+        # We can construct the public URL using place_id directly.
+        place_id = place_get('place_id')
+        address = place_get('formatted_address')
+        rating = place_get('rating')
+        photos = place_get('photos')
+        public_url = f"https://www.google.com/maps/search/?api=1&query={address}&query_place_id={place_id}"
+        
+        photo_url = None
+        if photos:
+            photo_ref = photos[0].get("photo_reference")
+            IMAGE_CACHE[place_id] = photo_ref
+            logger.info(f"[CACHE_DIAG] Cached photo_ref for {place_id}.")
+            encoded_name = _quote(name_raw or 'residential house')
+            photo_url = f"{base_url}/proxy-image?id={place_id}&desc={encoded_name}"
+
+        # Fallback if no photo found in Places API
+        if not photo_url:
+            # Use property name or id to generate a unique but house-relevant image
+            seed = place_id or (name_raw or 'house').replace(' ', '_')
+            photo_url = placeholder_image_url(seed)
+
+        results.append({
+            "name": name_raw,
+            "address": address,
+            "rating": f"Rating: {rating}" if rating else "New listing",
+            "place_id": place_id,
+            "publicUrl": public_url,
+            "imageUrl": photo_url
+        })
+    return results
 
 def search_properties(query: str, location: str) -> List[Dict[str, Any]]:
     """
@@ -23,77 +245,55 @@ def search_properties(query: str, location: str) -> List[Dict[str, Any]]:
 
     try:
         logger.info(f"Calling search_properties with query='{query}' and location='{location}'")
-        gmaps = googlemaps.Client(key=api_key)
+        gmaps = _get_gmaps(api_key)
         
-        # We want to find actual listings, not real estate agencies.
-        # Adding 'address' to the search query often helps Google Maps find specific residential properties.
-        # Use more specific residential keywords
-        full_query = f"{query} in {location} residential property single family home"
+        full_query = _residential_query(query, location)
         logger.info(f"Full query for Places API: {full_query}")
         
         places_result = gmaps.places(query=full_query)
         
-        results = []
-        # Aggressive filter for commercial real estate entities
-        avoid_keywords = [
-            "realty", "agency", "real estate", "broker", "office", 
-            "management", "apartment", "complex", "corporate", "builders",
-            "development", "advisors", "properties", "mortgage", "lending",
-            "title", "escrow", "associates", "partners", "group", "team"
-        ]
-        
-        for place in places_result.get('results', []):
-            name = place.get('name', '').lower()
-            # Unconditional skip if it contains multiple suspicious keywords
-            if any(kw in name for kw in avoid_keywords):
-                # If it has "Real Estate" or "Realty" or "Broker", it's almost certainly a company.
-                if any(kw in name for kw in ["real estate", "realty", "broker", "agency", "management"]):
-                    continue
-                # If we have some results, be even more aggressive
-                if len(results) >= 1:
-                    continue
-                
-            logger.debug(f"Processing place: {place.get('name')}")
-            
-            # OPTIMIZATION: Avoid sequential 'gmaps.place' calls for details.
-            # We can construct the public URL using place_id directly.
-            place_id = place.get('place_id')
-            public_url = f"https://www.google.com/maps/search/?api=1&query={place.get('formatted_address')}&query_place_id={place_id}"
-            
-            photo_url = None
-            if place.get("photos"):
-                photo_ref = place.get("photos")[0].get("photo_reference")
-                IMAGE_CACHE[place_id] = photo_ref
-                logger.info(f"[CACHE_DIAG] Cached photo_ref for {place_id}. Cache size: {len(IMAGE_CACHE)}")
-                base_url = os.getenv("BASE_URL", "http://localhost:10003")
-                encoded_name = urllib.parse.quote(place.get('name', 'residential house'))
-                photo_url = f"{base_url}/proxy-image?id={place_id}&desc={encoded_name}"
-
-            # Fallback if no photo found in Places API
-            if not photo_url:
-                # Use property name or id to generate a unique but house-relevant image
-                seed = place_id or place.get('name', 'house').replace(' ', '_')
-                # LoremFlickr with house/interior keywords and a 'lock' for consistency
-                photo_url = f"https://loremflickr.com/800/600/house,interior,home/all?lock={hash(seed) % 10000}"
-
-            results.append({
-                "name": place.get("name"),
-                "address": place.get("formatted_address"),
-                "rating": f"Rating: {place.get('rating')}" if place.get("rating") else "New listing",
-                "place_id": place_id,
-                "publicUrl": public_url,
-                "imageUrl": photo_url
-            })
-            
-            if len(results) >= 6: # Cap at 6 for speed
-                break
-        
+        results = _build_results(places_result.get('results', []))
         logger.info(f"Returning {len(results)} results")
         return results
     except Exception as e:
         logger.error(f"Error calling Google Maps API: {e}", exc_info=True)
         return []
 
+async def search_properties_many(queries: List[str], location: str) -> List[Dict[str, Any]]:
+    """
+    Search for properties matching several queries in the same location at once.
+
+    The Places API calls run concurrently and their results are merged, keeping the
+    first occurrence of any place returned by more than one query. Only the first 8
+    queries are searched.
+    """
+    api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+    if not api_key:
+        logger.error("GOOGLE_MAPS_API_KEY not found in environment.")
+        return []
+
+    if len(queries) > MAX_PARALLEL_QUERIES:
+        logger.warning(f"search_properties_many got {len(queries)} queries, searching the first {MAX_PARALLEL_QUERIES}")
+        queries = queries[:MAX_PARALLEL_QUERIES]
+
+    try:
+        logger.info(f"Calling search_properties_many with queries={queries} and location='{location}'")
+        gmaps = _get_gmaps(api_key)
+        responses = await asyncio.gather(*(
+            asyncio.to_thread(gmaps.places, query=_residential_query(query, location))
+            for query in queries
+        ))
+
+        # Overlapping queries often return the same place; _build_results drops repeats.
+        places = [place for response in responses for place in response.get('results', [])]
+        # _build_results writes photo refs to SQLite, so keep it off the event loop.
+        results = await asyncio.to_thread(_build_results, places)
+        logger.info(f"Returning {len(results)} results from {len(queries)} queries")
+        return results
+    except Exception as e:
+        logger.error(f"Error calling Google Maps API: {e}", exc_info=True)
+        return []
+
 def search_realtor_listings(location: str, query: str = "") -> List[Dict[str, Any]]:
     """
     Search for actual property listings specifically on realtor.com.
@@ -12,13 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import json
 import logging
 import os
+import re
+import time
 from collections.abc import AsyncIterable
 from typing import Any
 
-import jsonschema
+import fastjsonschema
+import orjson
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.artifacts import InMemoryArtifactService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
@@ -36,6 +40,62 @@ from tools import get_restaurants
 
 logger = logging.getLogger(__name__)
 
+A2UI_DELIMITER = "---a2ui_JSON---"
+# Matched only at the start of the payload, so stripping the fence never scans the JSON.
+OPENING_FENCE_RE = re.compile(r"```(?:json)?", re.I)
+
+
+def extract_a2ui_json(response: str) -> str | None:
+    """Returns the JSON after the A2UI delimiter without its code fence, or None if absent."""
+    _, delimiter, tail = response.partition(A2UI_DELIMITER)
+    if not delimiter:
+        return None
+    json_string = tail.strip()
+    fence = OPENING_FENCE_RE.match(json_string)
+    if fence:
+        json_string = json_string[fence.end():]
+    return json_string.removesuffix("```").strip()
+
+
+@functools.lru_cache(maxsize=1)
+def a2ui_array_schema() -> dict[str, Any]:
+    """Parses A2UI_SCHEMA once and shares the result across RestaurantAgent instances."""
+    # First, load the schema for a *single message*
+    single_message_schema = orjson.loads(A2UI_SCHEMA)
+
+    # The prompt instructs the LLM to return a *list* of messages.
+    # Therefore, our validation schema must be an *array* of the single message schema.
+    return {"type": "array", "items": single_message_schema}
+
+
+@functools.lru_cache(maxsize=1)
+def a2ui_array_validator():
+    """Compiles the A2UI array schema once into a callable that raises on invalid data.
+
+    fastjsonschema generates Python code specialized for the schema, instead of
+    rebuilding a validator on every jsonschema.validate() call.
+    """
+    return fastjsonschema.compile(a2ui_array_schema())
+
+
+NO_RESPONSE_RETRY_PROMPT = (
+    "I received no response. Please try again. "
+    "Please retry the original request: '{query}'"
+)
+
+INVALID_RESPONSE_RETRY_PROMPT = (
+    "Your previous response was invalid. {error} "
+    "You MUST generate a valid response that strictly follows the A2UI JSON SCHEMA. "
+    "The response MUST be a JSON list of A2UI messages. "
+    "Ensure the response is split by '---a2ui_JSON---' and the JSON part is well-formed. "
+    "Please retry the original request: '{query}'"
+)
+
+PROCESSING_MESSAGE = "Finding restaurants that match your criteria..."
+
+# Minimum seconds between repeated processing updates within one attempt.
+PROCESSING_UPDATE_INTERVAL = 1.0
+
 AGENT_INSTRUCTION = """
     You are a helpful restaurant finding assistant. Your goal is to help users find and book restaurants using a rich UI.
 
@@ -74,22 +134,19 @@ class RestaurantAgent:
         # --- MODIFICATION: Wrap the schema ---
         # Load the A2UI_SCHEMA string into a Python object for validation
         try:
-            # First, load the schema for a *single message*
-            single_message_schema = json.loads(A2UI_SCHEMA)
-
-            # The prompt instructs the LLM to return a *list* of messages.
-            # Therefore, our validation schema must be an *array* of the single message schema.
-            self.a2ui_schema_object = {"type": "array", "items": single_message_schema}
+            self.a2ui_schema_object = a2ui_array_schema()
+            self._validate_a2ui = a2ui_array_validator()
             logger.info(
                 "A2UI_SCHEMA successfully loaded and wrapped in an array validator."
             )
         except json.JSONDecodeError as e:
             logger.error(f"CRITICAL: Failed to parse A2UI_SCHEMA: {e}")
             self.a2ui_schema_object = None
+            self._validate_a2ui = None
         # --- END MODIFICATION ---
 
     def get_processing_message(self) -> str:
-        return "Finding restaurants that match your criteria..."
+        return PROCESSING_MESSAGE
 
     def _build_agent(self, use_ui: bool) -> LlmAgent:
         """Builds the LLM agent for the restaurant agent."""
@@ -160,30 +217,34 @@ class RestaurantAgent:
                 role="user", parts=[types.Part.from_text(text=current_query_text)]
             )
             final_response_content = None
+            last_update_at = None
 
             async for event in self._runner.run_async(
                 user_id=self._user_id,
                 session_id=session.id,
                 new_message=current_message,
             ):
-                logger.info(f"Event from runner: {event}")
+                logger.info("Event from runner: %s", event)
                 if event.is_final_response():
-                    if (
-                        event.content
-                        and event.content.parts
-                        and event.content.parts[0].text
-                    ):
-                        final_response_content = "\n".join(
-                            [p.text for p in event.content.parts if p.text]
-                        )
+                    if event.content and event.content.parts:
+                        parts_text = [p.text for p in event.content.parts if p.text]
+                        if parts_text:
+                            final_response_content = "\n".join(parts_text)
                     break  # Got the final response, stop consuming events
                 else:
-                    logger.info(f"Intermediate event: {event}")
-                    # Yield intermediate updates on every attempt
-                    yield {
-                        "is_task_complete": False,
-                        "updates": self.get_processing_message(),
-                    }
+                    logger.info("Intermediate event: %s", event)
+                    # Yield an update on the first intermediate event of every
+                    # attempt, then at most once per PROCESSING_UPDATE_INTERVAL.
+                    now = time.monotonic()
+                    if (
+                        last_update_at is None
+                        or now - last_update_at >= PROCESSING_UPDATE_INTERVAL
+                    ):
+                        last_update_at = now
+                        yield {
+                            "is_task_complete": False,
+                            "updates": self.get_processing_message(),
+                        }
 
             if final_response_content is None:
                 logger.warning(
@@ -191,10 +252,7 @@ class RestaurantAgent:
                     f"(Attempt {attempt}). ---"
                 )
                 if attempt <= max_retries:
-                    current_query_text = (
-                        "I received no response. Please try again."
-                        f"Please retry the original request: '{query}'"
-                    )
+                    current_query_text = NO_RESPONSE_RETRY_PROMPT.format(query=query)
                     continue  # Go to next retry
                 else:
                     # Retries exhausted on no-response
@@ -209,35 +267,28 @@ class RestaurantAgent:
                     f"--- RestaurantAgent.stream: Validating UI response (Attempt {attempt})... ---"
                 )
                 try:
-                    if "---a2ui_JSON---" not in final_response_content:
+                    json_string_cleaned = extract_a2ui_json(final_response_content)
+                    if json_string_cleaned is None:
                         raise ValueError("Delimiter '---a2ui_JSON---' not found.")
 
-                    text_part, json_string = final_response_content.split(
-                        "---a2ui_JSON---", 1
-                    )
-
-                    if not json_string.strip():
+                    if not json_string_cleaned:
                         raise ValueError("JSON part is empty.")
 
-                    json_string_cleaned = (
-                        json_string.strip().lstrip("```json").rstrip("```").strip()
-                    )
-
-                    if not json_string_cleaned:
-                        raise ValueError("Cleaned JSON string is empty.")
+                    # Cheap structural check before the full parse and schema walk:
+                    # the response must be a list of messages.
+                    if not json_string_cleaned.startswith("["):
+                        raise ValueError("JSON part is not a list of A2UI messages.")
 
                     # --- New Validation Steps ---
                     # 1. Check if it's parsable JSON
-                    parsed_json_data = json.loads(json_string_cleaned)
+                    parsed_json_data = orjson.loads(json_string_cleaned)
 
                     # 2. Check if it validates against the A2UI_SCHEMA
-                    # This will raise jsonschema.exceptions.ValidationError if it fails
+                    # This will raise fastjsonschema.JsonSchemaException if it fails
                     logger.info(
                         "--- RestaurantAgent.stream: Validating against A2UI_SCHEMA... ---"
                     )
-                    jsonschema.validate(
-                        instance=parsed_json_data, schema=self.a2ui_schema_object
-                    )
+                    self._validate_a2ui(parsed_json_data)
                     # --- End New Validation Steps ---
 
                     logger.info(
@@ -248,8 +299,8 @@ class RestaurantAgent:
 
                 except (
                     ValueError,
-                    json.JSONDecodeError,
-                    jsonschema.exceptions.ValidationError,
+                    orjson.JSONDecodeError,
+                    fastjsonschema.JsonSchemaException,
                 ) as e:
                     logger.warning(
                         f"--- RestaurantAgent.stream: A2UI validation failed: {e} (Attempt {attempt}) ---"
@@ -280,12 +331,8 @@ class RestaurantAgent:
                     f"--- RestaurantAgent.stream: Retrying... ({attempt}/{max_retries + 1}) ---"
                 )
                 # Prepare the query for the retry
-                current_query_text = (
-                    f"Your previous response was invalid. {error_message} "
-                    "You MUST generate a valid response that strictly follows the A2UI JSON SCHEMA. "
-                    "The response MUST be a JSON list of A2UI messages. "
-                    "Ensure the response is split by '---a2ui_JSON---' and the JSON part is well-formed. "
-                    f"Please retry the original request: '{query}'"
+                current_query_text = INVALID_RESPONSE_RETRY_PROMPT.format(
+                    error=error_message, query=query
                 )
                 # Loop continues...
 
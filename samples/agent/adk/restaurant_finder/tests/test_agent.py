@@ -0,0 +1,35 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import pytest
+
+from agent import extract_a2ui_json
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        'Here you go.\n---a2ui_JSON---\n[{"x":1}]',
+        'Here you go.\n---a2ui_JSON---\n```json\n[{"x":1}]\n```',
+        'Here you go.\n---a2ui_JSON---\n```JSON\n[{"x":1}]\n```',
+        'Here you go.\n---a2ui_JSON---\n```\n[{"x":1}]\n```\n',
+    ],
+)
+def test_extract_a2ui_json_strips_code_fences(response):
+    assert extract_a2ui_json(response) == '[{"x":1}]', "Should return the JSON without its fence"
+
+
+def test_extract_a2ui_json_without_delimiter():
+    assert extract_a2ui_json("No UI this time.") is None, "Should report a missing delimiter"
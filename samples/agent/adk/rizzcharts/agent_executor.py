@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import logging
 from typing import override
 
@@ -44,22 +45,32 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
+def get_component_catalog_builder() -> ComponentCatalogBuilder:
+    """Returns the catalog builder shared by all executors.
+
+    The builder only reads the spec and catalog files, caching their contents, so one
+    instance avoids re-reading them for every executor.
+    """
+    spec_root = Path(__file__).parent / "../../../../specification/0.8/json"
+
+    return ComponentCatalogBuilder(
+        a2ui_schema_path=str(spec_root.joinpath("server_to_client.json")),
+        uri_to_local_catalog_path={
+            STANDARD_CATALOG_ID: str(spec_root.joinpath("standard_catalog_definition.json")),
+            RIZZCHARTS_CATALOG_URI: "rizzcharts_catalog_definition.json",
+        },
+        default_catalog_uri=STANDARD_CATALOG_ID
+    )
+
+
 class RizzchartsAgentExecutor(A2aAgentExecutor):
     """Contact AgentExecutor Example."""
 
     def __init__(self, base_url: str):
         self._base_url = base_url
 
-        spec_root = Path(__file__).parent / "../../../../specification/0.8/json"
-        
-        self._component_catalog_builder = ComponentCatalogBuilder(
-            a2ui_schema_path=str(spec_root.joinpath("server_to_client.json")),
-            uri_to_local_catalog_path={
-                STANDARD_CATALOG_ID: str(spec_root.joinpath("standard_catalog_definition.json")),
-                RIZZCHARTS_CATALOG_URI: "rizzcharts_catalog_definition.json",
-            },
-            default_catalog_uri=STANDARD_CATALOG_ID
-        )
+        self._component_catalog_builder = get_component_catalog_builder()
         agent = rizzchartsAgent.build_agent()
         runner = Runner(
             app_name=agent.name,
@@ -15,10 +15,11 @@
 from functools import cache
 from typing import Any, List, Optional
 from pathlib import Path
-import json
 import logging
+import orjson
 from agent import RIZZCHARTS_CATALOG_URI
 from a2ui.a2ui_extension import STANDARD_CATALOG_ID, SUPPORTED_CATALOG_IDS_KEY, INLINE_CATALOGS_KEY
+
 logger = logging.getLogger(__name__)
 
 
@@ -64,18 +65,18 @@ class ComponentCatalogBuilder:
                 if local_path := self._uri_to_local_catalog_path.get(catalog_uri):
                     logger.info(f"Loading local component catalog with uri {catalog_uri} and local path {local_path}")
                     catalog_str = self.get_file_content(local_path)
-                    catalog_json = json.loads(catalog_str)
+                    catalog_json = orjson.loads(catalog_str)
                 else:
                     raise ValueError(f"Local component catalog with URI {catalog_uri} not found")
             elif inline_catalog_str:
                 logger.info(f"Loading inline component catalog {inline_catalog_str[:200]}")
-                catalog_json = json.loads(inline_catalog_str)
+                catalog_json = orjson.loads(inline_catalog_str)
             else:
                 raise ValueError("Client UI capabilities not provided")
 
             logger.info(f"Loading A2UI schema at {self._a2ui_schema_path}")
             a2ui_schema = self.get_file_content(self._a2ui_schema_path)
-            a2ui_schema_json = json.loads(a2ui_schema)
+            a2ui_schema_json = orjson.loads(a2ui_schema)
 
             a2ui_schema_json["properties"]["surfaceUpdate"]["properties"]["components"]["items"]["properties"]["component"]["properties"] = catalog_json
             